@@ -2,55 +2,106 @@
 Live Earthquake Detection System
 Monitors Ekşi Sözlük gündem every 30 seconds for earthquake başlıks
 """
+import atexit
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import time
 from datetime import datetime
-import json
+import orjson
 import os
-from earthquake_patterns import is_earthquake_baslik
+from collections import OrderedDict
+from earthquake_patterns import current_dates, match_basliks
 
 # Configuration
 GUNDEM_URL = "https://eksisozluk.com/basliklar/gundem"
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 POLL_INTERVAL = 30  # seconds
 HEARTBEAT_INTERVAL = 2  # Log heartbeat every N fetches (120 fetches = 1 hour with 30s polling)
+MAX_DETECTED_IDS = 10_000  # Earthquake IDs kept in memory for duplicate suppression
 
 # Data directories
 DATA_DIR = "data"
 LOGS_DIR = "logs"
 DETECTED_EVENTS_FILE = os.path.join(DATA_DIR, "detected_events.jsonl")
+DETECTED_IDS_FILE = os.path.join(DATA_DIR, "detected_ids.txt")
 GUNDEM_LOG_FILE = os.path.join(LOGS_DIR, "gundem_monitor.log")
 
+# Shared HTTP session so the TCP/TLS connection is reused across polls (keep-alive)
+SESSION = requests.Session()
+SESSION.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'})
+SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2,
+                                      max_retries=Retry(total=2, backoff_factor=0.5)))
+
+# Output files, opened once in setup_directories() (line-buffered so tail -f keeps working)
+_log_fp = None
+_events_fp = None
+_ids_fp = None
+
+# Validators from the last gündem response, sent back for conditional GETs
+_last_etag = None
+_last_modified = None
+
 
 def setup_directories():
-    """Create data and logs directories"""
+    """Create data and logs directories and open the output files for appending"""
+    global _log_fp, _events_fp, _ids_fp
+
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(LOGS_DIR, exist_ok=True)
 
+    _log_fp = open(GUNDEM_LOG_FILE, 'a', encoding='utf-8', buffering=1)
+    _events_fp = open(DETECTED_EVENTS_FILE, 'a', encoding='utf-8', buffering=1)
+    _ids_fp = open(DETECTED_IDS_FILE, 'a', encoding='utf-8', buffering=1)
+    for fp in (_log_fp, _events_fp, _ids_fp):
+        atexit.register(fp.close)
+
+
+def load_detected_ids() -> OrderedDict:
+    """Load already alerted earthquake IDs so a restart does not re-alert them"""
+    detected_ids = OrderedDict()
+    if os.path.exists(DETECTED_IDS_FILE):
+        with open(DETECTED_IDS_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                earthquake_id = line.strip()
+                if earthquake_id:
+                    remember_earthquake_id(detected_ids, earthquake_id)
+    return detected_ids
+
+
+def remember_earthquake_id(detected_ids: OrderedDict, earthquake_id: str):
+    """Mark ID as most recently seen, evicting the oldest once MAX_DETECTED_IDS is exceeded"""
+    detected_ids[earthquake_id] = None
+    detected_ids.move_to_end(earthquake_id)
+    if len(detected_ids) > MAX_DETECTED_IDS:
+        detected_ids.popitem(last=False)
+
+
+def save_detected_id(earthquake_id: str):
+    """Append alerted earthquake ID to the sidecar file"""
+    _ids_fp.write(earthquake_id + '\n')
+
 
 def log_message(message: str, to_file: bool = True):
-    """Log message to console and optionally to file"""
+    """Log message to console and optionally to file (once setup_directories() has run)"""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     log_line = f"[{timestamp}] {message}"
     print(log_line)
 
-    if to_file:
-        with open(GUNDEM_LOG_FILE, 'a', encoding='utf-8') as f:
-            f.write(log_line + '\n')
+    if to_file and _log_fp is not None:
+        _log_fp.write(log_line + '\n')
 
 
 def save_earthquake_event(baslik_data: dict, pattern_match: dict):
     """Save detected earthquake event to file"""
     event = {
-        'detected_at': datetime.now().isoformat(),
+        'detected_at': datetime.now(),  # orjson serializes datetimes as ISO 8601
         'baslik': baslik_data,
         'earthquake_info': pattern_match
     }
 
-    with open(DETECTED_EVENTS_FILE, 'a', encoding='utf-8') as f:
-        json.dump(event, f, ensure_ascii=False)
-        f.write('\n')
+    _events_fp.write(orjson.dumps(event).decode('utf-8') + '\n')
 
     log_message(f"🚨 EARTHQUAKE DETECTED: {pattern_match['day']} {pattern_match['month_name']} "
                 f"{pattern_match['year']} - {pattern_match['province'].upper()}")
@@ -61,49 +112,100 @@ def save_earthquake_event(baslik_data: dict, pattern_match: dict):
 
 
 def fetch_gundem():
-    """Fetch gündem page and extract all başlıks"""
+    """
+    Fetch gündem page and extract all başlıks
+    Returns None if the page is unchanged since the last fetch (304 Not Modified)
+    """
+    global _last_etag, _last_modified
+
     try:
-        headers = {'User-Agent': USER_AGENT}
-        response = requests.get(GUNDEM_URL, headers=headers, timeout=20)
+        headers = {}
+        if _last_etag:
+            headers['If-None-Match'] = _last_etag
+        if _last_modified:
+            headers['If-Modified-Since'] = _last_modified
+
+        response = SESSION.get(GUNDEM_URL, headers=headers, timeout=20)
+        if response.status_code == 304:
+            return None
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        topic_list = soup.find('ul', class_='topic-list')
+        tree = LexborHTMLParser(response.content)
+        topic_list = tree.css_first('ul.topic-list')
 
-        if not topic_list:
+        if topic_list is None:
+            # Don't cache validators of an error/challenge page, or later 304s would hide gündem
+            _last_etag = _last_modified = None
             log_message("⚠️  Could not find topic-list")
             return []
 
+        # One timestamp for the whole batch, all başlıks come from the same fetch
+        fetched_at = datetime.now().isoformat()
         basliks = []
-        for li in topic_list.find_all('li'):
-            a_tag = li.find('a')
-            if a_tag and a_tag.get('href'):
-                title = a_tag.get_text(strip=True)
-                small_tag = a_tag.find('small')
-                if small_tag:
-                    entry_count = small_tag.get_text(strip=True)
-                    title = title.replace(entry_count, '').strip()
-                else:
-                    entry_count = "0"
-
-                url = a_tag.get('href')
-                basliks.append({
-                    'title': title,
-                    'url': url,
-                    'entry_count': entry_count,
-                    'timestamp': datetime.now().isoformat()
-                })
-
+        for a_tag in topic_list.css('li > a[href]:not([href=""])'):
+            # The entry count sits in a nested <small>; drop it so the rest is the title
+            small_tag = a_tag.css_first('small')
+            if small_tag is not None:
+                entry_count = small_tag.text(strip=True)
+                small_tag.decompose()
+            else:
+                entry_count = "0"
+            title = ' '.join(a_tag.text().split())
+
+            basliks.append({
+                'title': title,
+                'url': a_tag.attributes['href'],
+                'entry_count': entry_count,
+                'timestamp': fetched_at
+            })
+
+        # Only a successfully parsed page may be answered with 304 on the next poll
+        _last_etag = response.headers.get('ETag')
+        _last_modified = response.headers.get('Last-Modified')
         return basliks
 
     except requests.exceptions.RequestException as e:
+        _last_etag = _last_modified = None
         log_message(f"❌ HTTP error: {e}")
         return []
     except Exception as e:
+        _last_etag = _last_modified = None
         log_message(f"❌ Error: {e}")
         return []
 
 
+def check_basliks(basliks: list, detected_earthquakes: OrderedDict, valid_dates: frozenset):
+    """Check fetched başlıks for earthquake patterns and alert on new earthquakes"""
+    titles = [baslik['title'] for baslik in basliks]
+    for index, pattern_match in match_basliks(titles, valid_dates=valid_dates):
+        baslik = basliks[index]
+
+        # Create unique ID for this earthquake event
+        earthquake_id = f"{pattern_match['day']}-{pattern_match['month']}-{pattern_match['year']}-{pattern_match['province']}"
+
+        # Only alert if we haven't seen this earthquake before
+        if earthquake_id not in detected_earthquakes:
+            save_earthquake_event(baslik, pattern_match)
+            save_detected_id(earthquake_id)
+        remember_earthquake_id(detected_earthquakes, earthquake_id)
+
+
+def wait_for_next_poll(next_tick: float) -> float:
+    """
+    Sleep until the next scheduled poll, keeping a fixed cadence regardless of fetch time
+    Returns the monotonic time of the poll that is about to run
+    """
+    next_tick += POLL_INTERVAL
+    now = time.monotonic()
+
+    # After a long stall (e.g. system suspend) start a fresh schedule instead of catching up
+    if now - next_tick > 2 * POLL_INTERVAL:
+        next_tick = now + POLL_INTERVAL
+
+    time.sleep(max(0.0, next_tick - now))
+    return next_tick
+
+
 def monitor_earthquakes():
     """Main monitoring loop"""
     setup_directories()
@@ -115,33 +217,29 @@ def monitor_earthquakes():
     log_message(f"   Monitoring: {GUNDEM_URL}")
     log_message("=" * 50)
 
-    detected_earthquakes = set()  # Track already detected earthquakes to avoid duplicates
+    # Track already detected earthquakes (persisted across restarts) to avoid duplicates
+    detected_earthquakes = load_detected_ids()
+    if detected_earthquakes:
+        log_message(f"   Loaded {len(detected_earthquakes)} previously detected earthquake IDs")
     fetch_count = 0
+    next_tick = time.monotonic()
 
     while True:
         try:
             basliks = fetch_gundem()
             fetch_count += 1
 
-            if basliks:
+            # None means gündem is unchanged (304), so there is nothing new to check
+            if basliks is None or basliks:
                 # Heartbeat: log every N fetches to show system is alive
                 if fetch_count % HEARTBEAT_INTERVAL == 0:
                     log_message(f"System healthy: {fetch_count} checks completed, monitoring continues...")
 
+            if basliks:
                 # Check each başlık for earthquake pattern
-                for baslik in basliks:
-                    pattern_match = is_earthquake_baslik(baslik['title'])
-
-                    if pattern_match:
-                        # Create unique ID for this earthquake event
-                        earthquake_id = f"{pattern_match['day']}-{pattern_match['month']}-{pattern_match['year']}-{pattern_match['province']}"
-
-                        # Only alert if we haven't seen this earthquake before
-                        if earthquake_id not in detected_earthquakes:
-                            save_earthquake_event(baslik, pattern_match)
-                            detected_earthquakes.add(earthquake_id)
+                check_basliks(basliks, detected_earthquakes, valid_dates=current_dates())
 
-            time.sleep(POLL_INTERVAL)
+            next_tick = wait_for_next_poll(next_tick)
 
         except KeyboardInterrupt:
             log_message("=" * 80)
@@ -150,7 +248,7 @@ def monitor_earthquakes():
             break
         except Exception as e:
             log_message(f"❌ Unexpected error in main loop: {e}")
-            time.sleep(POLL_INTERVAL)
+            next_tick = wait_for_next_poll(next_tick)
 
 
 if __name__ == "__main__":
@@ -4,8 +4,10 @@ Matches format: [day] [month] [year] [province] (deprem/depremi)
 Example: "6 şubat 2025 kahramanmaraş depremi"
 """
 import re
-from typing import Optional, Dict
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Optional, Dict, FrozenSet, List, Tuple
+from datetime import datetime, date, timedelta
 
 # 81 Turkish provinces (official)
 PROVINCES = [
@@ -40,104 +42,130 @@ MONTHS = {
 # Common earthquake keywords
 EARTHQUAKE_KEYWORDS = ["deprem", "depremi"]
 
+# Cheap substring prefilter: titles without any of these are rejected before regex work
+PREFILTER_KEYWORDS = ("deprem", "sarsınt", "sarsint")
+
+
+# Turkish -> ASCII folding table (applied after lowercasing, so lowercase letters suffice)
+_TR_TABLE = str.maketrans({
+    'ı': 'i',
+    'ğ': 'g',
+    'ü': 'u',
+    'ş': 's',
+    'ö': 'o',
+    'ç': 'c',
+    'â': 'a',
+    '\u0307': None  # combining dot left behind by "İ".lower()
+})
+
 
 def normalize_turkish(text: str) -> str:
     """Normalize Turkish text for matching (lowercase, handle special chars)"""
-    text = text.lower()
-    # Common replacements for matching
-    replacements = {
-        'ı': 'i',
-        'ğ': 'g',
-        'ü': 'u',
-        'ş': 's',
-        'ö': 'o',
-        'ç': 'c',
-        'İ': 'i',
-        'Ğ': 'g',
-        'Ü': 'u',
-        'Ş': 's',
-        'Ö': 'o',
-        'Ç': 'c'
-    }
-    normalized = text
-    for tr_char, en_char in replacements.items():
-        normalized = normalized.replace(tr_char, en_char)
-    return normalized
+    return text.lower().translate(_TR_TABLE)
+
+
+# Precompiled patterns (built once at import instead of on every title)
+_DAY_RE = re.compile(r'\b([1-9]|[12][0-9]|3[01])\b')
+_YEAR_RE = re.compile(r'\b(20\d{2})\b')
+
+
+def _union_pattern(words) -> re.Pattern:
+    """Compile words into one word-bounded alternation (longest first so longer words win)"""
+    alternation = '|'.join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+    return re.compile(r'\b(' + alternation + r')\b')
+
+
+_MONTH_RE = _union_pattern(MONTHS)
+
+# Keyword prefilter as one regex, for scanning a whole batch of titles in a single pass.
+# Case-insensitive matching finds a superset of the per-title lowercase substring check.
+_PREFILTER_RE = re.compile('|'.join(map(re.escape, PREFILTER_KEYWORDS)), re.IGNORECASE)
+
+# Normalized spelling -> province name as first listed in PROVINCES, so that
+# "kahramanmaras" and "kahramanmaraş" report (and dedupe as) the same province
+_PROVINCE_NAMES = {}
+for _province in PROVINCES:
+    _PROVINCE_NAMES.setdefault(normalize_turkish(_province), _province)
 
+# Spelling variants collapse once normalized; every province name is a single word,
+# so matching is a set lookup per word of the normalized title
+_PROVINCES_SET = frozenset(_PROVINCE_NAMES)
+_WORD_RE = re.compile(r'\w+')
 
-def is_date_current(day: int, month: int, year: int, tolerance_days: int = 1) -> bool:
+
+def current_dates(today: Optional[date] = None, tolerance_days: int = 1) -> FrozenSet[Tuple[int, int, int]]:
+    """
+    Build the set of (day, month, year) triples within ±tolerance_days of today
+    Computed once per poll so each title's date check is a single set lookup
+    """
+    if today is None:
+        today = datetime.now().date()
+    return frozenset(
+        (d.day, d.month, d.year)
+        for d in (today + timedelta(days=offset) for offset in range(-tolerance_days, tolerance_days + 1))
+    )
+
+
+def is_date_current(day: int, month: int, year: int, tolerance_days: int = 1,
+                    today: Optional[date] = None) -> bool:
     """
     Check if extracted date is within tolerance window from current date
     tolerance_days: ±N days from current date (default ±1 day)
+    today: current date, if already known (defaults to datetime.now().date())
 
-    Returns True if date is current, False if too old/future
+    Returns True if date is current, False if too old/future (or invalid, e.g. February 30)
     """
-    try:
-        extracted_date = datetime(year, month, day).date()
-        current_date = datetime.now().date()
-
-        # Calculate time difference in days
-        time_diff = abs((extracted_date - current_date).days)
+    return (day, month, year) in current_dates(today, tolerance_days)
 
-        return time_diff <= tolerance_days
-    except ValueError:
-        # Invalid date (e.g., February 30)
-        return False
 
-
-def is_earthquake_baslik(title: str) -> Optional[Dict]:
+@lru_cache(maxsize=4096)
+def _parse_baslik(title: str) -> Optional[Tuple]:
     """
-    Check if başlık title matches earthquake pattern
-    Pattern: [day] [month] [year] [province] (optional: deprem/depremi)
+    Date-independent part of the matcher, memoized per title since gündem
+    shows mostly the same başlıks on consecutive polls
 
-    Returns dict with extracted info if match, None otherwise
+    Returns (day, month, month_name, year, province, has_earthquake_keyword) or None
     """
     title_lower = title.lower()
-    title_normalized = normalize_turkish(title)
+
+    # Nearly every gündem başlık is unrelated; a substring check rejects those cheaply,
+    # before paying for normalization
+    if not any(kw in title_lower for kw in PREFILTER_KEYWORDS):
+        return None
+
+    # Already lowercased, so only the translate step of normalize_turkish() is needed
+    title_normalized = title_lower.translate(_TR_TABLE)
 
     # Pattern: day (1-31) + month name + year (2000-2099) + province
     # Example: "6 şubat 2025 kahramanmaraş depremi"
 
     # Check for day (1-31)
-    day_match = re.search(r'\b([1-9]|[12][0-9]|3[01])\b', title)
+    day_match = _DAY_RE.search(title)
     if not day_match:
         return None
 
     day = int(day_match.group(1))
 
-    # Check for month
-    month = None
-    month_name = None
-    for month_str, month_num in MONTHS.items():
-        if month_str in title_lower:
-            month = month_num
-            month_name = month_str
-            break
-
-    if not month:
+    # Check for month (whole word, so "martın" does not count as "mart")
+    month_match = _MONTH_RE.search(title_lower)
+    if not month_match:
         return None
 
+    month_name = month_match.group(1)
+    month = MONTHS[month_name]
+
     # Check for year (2000-2099)
-    year_match = re.search(r'\b(20\d{2})\b', title)
+    year_match = _YEAR_RE.search(title)
     if not year_match:
         return None
 
     year = int(year_match.group(1))
 
-    # Temporal validation: date must be within ±1 day of current date
-    if not is_date_current(day, month, year, tolerance_days=1):
-        return None
-
-    # Check for province (use word boundaries to avoid false matches)
+    # Check for province (whole words only, to avoid false matches)
     found_province = None
-    for province in PROVINCES:
-        province_normalized = normalize_turkish(province)
-        # Use regex with word boundaries to match whole words only
-        pattern = r'\b' + re.escape(province) + r'\b'
-        pattern_normalized = r'\b' + re.escape(province_normalized) + r'\b'
-
-        if re.search(pattern, title_lower) or re.search(pattern_normalized, title_normalized):
-            found_province = province
+    for word in _WORD_RE.findall(title_normalized):
+        if word in _PROVINCES_SET:
+            found_province = _PROVINCE_NAMES[word]
             break
 
     if not found_province:
@@ -146,6 +174,30 @@ def is_earthquake_baslik(title: str) -> Optional[Dict]:
     # Check if earthquake keyword is present (optional but increases confidence)
     has_earthquake_keyword = any(kw in title_lower for kw in EARTHQUAKE_KEYWORDS)
 
+    return day, month, month_name, year, found_province, has_earthquake_keyword
+
+
+def is_earthquake_baslik(title: str, valid_dates: Optional[FrozenSet] = None) -> Optional[Dict]:
+    """
+    Check if başlık title matches earthquake pattern
+    Pattern: [day] [month] [year] [province] + deprem/sarsıntı keyword
+    valid_dates: result of current_dates(), pass it in when checking a whole batch of titles
+
+    Returns dict with extracted info if match, None otherwise
+    """
+    parsed = _parse_baslik(title)
+    if parsed is None:
+        return None
+
+    day, month, month_name, year, found_province, has_earthquake_keyword = parsed
+
+    # Temporal validation: date must be within ±1 day of current date
+    # (kept outside the cache so results stay correct across midnight)
+    if valid_dates is None:
+        valid_dates = current_dates(tolerance_days=1)
+    if (day, month, year) not in valid_dates:
+        return None
+
     return {
         'day': day,
         'month': month,
@@ -157,6 +209,35 @@ def is_earthquake_baslik(title: str) -> Optional[Dict]:
     }
 
 
+def match_basliks(titles: List[str], valid_dates: Optional[FrozenSet] = None) -> List[Tuple[int, Dict]]:
+    """
+    Check a whole batch of başlık titles (e.g. one gündem fetch) for earthquake patterns
+    The keyword prefilter runs once over all titles joined together; only titles it
+    flags go through is_earthquake_baslik
+
+    Returns list of (index into titles, match dict) pairs
+    """
+    if valid_dates is None:
+        valid_dates = current_dates(tolerance_days=1)
+
+    # Start offset of each title inside the joined blob, to map matches back to indices
+    starts = []
+    offset = 0
+    for title in titles:
+        starts.append(offset)
+        offset += len(title) + 1
+    blob = '\n'.join(titles)
+
+    candidates = sorted({bisect_right(starts, m.start()) - 1 for m in _PREFILTER_RE.finditer(blob)})
+
+    matches = []
+    for index in candidates:
+        match = is_earthquake_baslik(titles[index], valid_dates=valid_dates)
+        if match:
+            matches.append((index, match))
+    return matches
+
+
 def test_patterns():
     """Test the pattern matcher with sample başlıks"""
     current_date = datetime.now()